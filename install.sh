@@ -94,6 +94,10 @@ if ! command -v mat2 &> /dev/null; then
     MISSING_DEPS+=("mat2")
 fi
 
+if ! command -v zstd &> /dev/null; then
+    MISSING_DEPS+=("zstd")
+fi
+
 # Install missing dependencies
 if [ ${#MISSING_DEPS[@]} -gt 0 ]; then
     print_warning "Missing dependencies: ${MISSING_DEPS[*]}"
@@ -167,8 +171,8 @@ echo ""
 echo -e "${BLUE}Features included:${NC}"
 echo "  ✓ Encryption with ChaCha20-Poly1305 (state of the art)"
 echo "  ✓ Encrypt multiple files at once"
-echo "  ✓ Encrypt complete folders (tar.gz + age)"
-echo "  ✓ Secure deletion of original files (3 passes)"
+echo "  ✓ Encrypt complete folders (tar.zst + age)"
+echo "  ✓ Secure deletion of original files (single pass)"
 echo "  ✓ Automatic integrity verification"
 echo "  ✓ Automatic folder decompression"
 echo "  ✓ System notifications"
@@ -8,7 +8,7 @@ Nautilus extension for encrypting/decrypting files with age (Actually Good Encry
 Features:
 - Encrypt individual files
 - Encrypt multiple files at once
-- Encrypt complete folders (tar.gz + age)
+- Encrypt complete folders (tar.zst + age)
 - Decrypt .age files
 - Secure deletion of original file (optional)
 - Integrity verification before decrypting
@@ -21,20 +21,26 @@ License: MIT
 
 import argparse
 import base64
+import contextlib
+import ctypes
+import fcntl
 import json
 import logging
 import os
 import pty
-import secrets
+import random
+import select
 import shutil
+import stat
 import subprocess
 import sys
+import tarfile
 import tempfile
 import time
-from collections import defaultdict
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from urllib.parse import unquote, urlparse
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 
 # Configure logging for the extension (errors only)
 logging.basicConfig(
@@ -47,6 +53,48 @@ logger = logging.getLogger('age-nautilus')
 RATE_LIMIT_MAX_ATTEMPTS = 3
 RATE_LIMIT_LOCKOUT_SECONDS = 30
 RATE_LIMIT_WINDOW_SECONDS = 300  # 5 minutes
+RATE_LIMIT_MAX_TRACKED_FILES = 4096  # oldest entries are evicted beyond this
+
+# File extensions mat2 can clean (from mat2's parsers); other files are skipped
+# without spawning mat2. Compressed tarballs match on their last suffix.
+MAT2_SUPPORTED_EXTENSIONS = frozenset([
+    # Images
+    '.bmp', '.gif', '.heic', '.heif', '.jpe', '.jpeg', '.jpg', '.png', '.ppm',
+    '.svg', '.svgz', '.tif', '.tiff', '.webp',
+    # Audio and video
+    '.aif', '.aifc', '.aiff', '.avi', '.flac', '.mp3', '.mp4', '.oga', '.ogg',
+    '.opus', '.wav', '.wmv',
+    # Documents
+    '.docx', '.epub', '.odc', '.odf', '.odg', '.odi', '.odp', '.ods', '.odt',
+    '.pdf', '.pptx', '.xlsx',
+    # Archives
+    '.bz2', '.gz', '.tar', '.tgz', '.xz', '.zip',
+    # Web and misc
+    '.css', '.htm', '.html', '.torrent', '.xhtml',
+])
+
+# Critical system directories: never operate on them or anything inside them
+SYSTEM_DIRECTORIES = frozenset(['/bin', '/sbin', '/usr', '/etc', '/var', '/boot', '/root'])
+SYSTEM_DIRECTORY_PREFIXES = tuple(d + os.sep for d in SYSTEM_DIRECTORIES)
+
+# Archive compressors for tar, in order of preference: (binary, tar program)
+# zstd -T0 and pigz use all cores; plain gzip is the single-threaded last resort
+ARCHIVE_COMPRESSORS = [
+    ('zstd', 'zstd -T0 -3'),
+    ('pigz', 'pigz'),
+    ('gzip', 'gzip'),
+]
+# Magic bytes of compressed archives produced by the compressors above
+GZIP_MAGIC = b'\x1f\x8b'          # gzip / pigz
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'  # zstd
+ARCHIVE_MAGICS = (GZIP_MAGIC, ZSTD_MAGIC)
+# Every age file starts with this version line
+AGE_MAGIC = b'age-encryption.org/v1'
+# What age prints on stderr when the passphrase does not open a file
+AGE_WRONG_PASSPHRASE = 'incorrect passphrase'
+
+# Chunk size for in-process file I/O (overwrite without shred, copy fallback)
+IO_CHUNK_SIZE = 1 << 20  # 1 MiB
 
 # === PKCS#11 HSM Support (Optional) ===
 # SafeNet eToken module paths to auto-detect
@@ -60,44 +108,44 @@ PKCS11_MODULE_PATHS = [
 PKCS11_RANDOM_BYTES = 256  # 2048 bits of entropy (~342 chars Base64)
 PKCS11_TIMEOUT = 30  # seconds
 
+# Max wait for age to show its passphrase prompt on the PTY before writing anyway
+AGE_PROMPT_TIMEOUT = 5  # seconds
+# Parallel age processes for batch decryption. Each passphrase decryption runs
+# scrypt with ~256 MiB of memory, so keep this small even on many-core machines
+DECRYPT_MAX_WORKERS = min(4, os.cpu_count() or 1)
+
 # Detect available Nautilus version
 # IMPORTANT: DO NOT use exit() - it crashes Nautilus
-from gi import require_version
+from gi import Repository, require_version
+
+# Supported Nautilus typelibs (newest first) and the GTK/GDK version each needs:
+# 4.1 (Debian 13/Trixie, Ubuntu 24.04+), 4.0 (older versions), 3.0 (legacy)
+NAUTILUS_GTK_VERSIONS = [
+    ('4.1', '4.0'),
+    ('4.0', '4.0'),
+    ('3.0', '3.0'),
+]
 
 NAUTILUS_VERSION = None
-_import_error = None
-
-# Try Nautilus 4.1 (Debian 13/Trixie, Ubuntu 24.04+)
-try:
-    require_version('Nautilus', '4.1')
-    require_version('Gtk', '4.0')
-    require_version('Gdk', '4.0')
-    from gi.repository import Nautilus, GObject, Gtk, Gio, Gdk, GLib
-    NAUTILUS_VERSION = 4
-except (ValueError, ImportError):
-    pass
-
-# Try Nautilus 4.0 (older versions)
-if NAUTILUS_VERSION is None:
-    try:
-        require_version('Nautilus', '4.0')
-        require_version('Gtk', '4.0')
-        require_version('Gdk', '4.0')
-        from gi.repository import Nautilus, GObject, Gtk, Gio, Gdk, GLib
-        NAUTILUS_VERSION = 4
-    except (ValueError, ImportError):
-        pass
-
-# Try Nautilus 3.0 (legacy)
-if NAUTILUS_VERSION is None:
+_import_error: Optional[str] = None
+
+# Ask GI which Nautilus typelibs are installed, then load only the newest
+# supported one (no trial imports of versions that are not there)
+_installed_versions = Repository.get_default().enumerate_versions('Nautilus')
+for _nautilus_version, _gtk_version in NAUTILUS_GTK_VERSIONS:
+    if _nautilus_version not in _installed_versions:
+        continue
     try:
-        require_version('Nautilus', '3.0')
-        require_version('Gtk', '3.0')
-        require_version('Gdk', '3.0')
+        require_version('Nautilus', _nautilus_version)
+        require_version('Gtk', _gtk_version)
+        require_version('Gdk', _gtk_version)
         from gi.repository import Nautilus, GObject, Gtk, Gio, Gdk, GLib
-        NAUTILUS_VERSION = 3
+        NAUTILUS_VERSION = int(_nautilus_version.split('.')[0])
     except (ValueError, ImportError) as e:
-        _import_error = e
+        _import_error = str(e)
+    break
+else:
+    _import_error = f"no supported Nautilus typelib (installed: {_installed_versions})"
 
 # If no version could be imported, create dummy class to avoid crash
 if NAUTILUS_VERSION is None:
@@ -117,7 +165,8 @@ if NAUTILUS_VERSION is None:
 
 # Wordlist for passphrase generation (~500 common English words, 4-8 letters)
 # Based on EFF's diceware wordlist for memorable passphrases
-PASSPHRASE_WORDLIST = [
+# Stored as an immutable tuple of interned strings (compact, read-only)
+PASSPHRASE_WORDLIST = tuple(sys.intern(word) for word in [
     "about", "above", "acid", "actor", "adopt", "adult", "after", "again",
     "agent", "agree", "ahead", "alarm", "album", "alert", "alien", "alive",
     "alley", "allow", "alone", "alpha", "alter", "amino", "among", "ample",
@@ -273,7 +322,16 @@ PASSPHRASE_WORDLIST = [
     "worst", "worth", "would", "wound", "woven", "wrath", "wreck", "wrist",
     "write", "wrong", "wrote", "yacht", "yards", "years", "yeast", "yield",
     "young", "yours", "youth", "zebra", "zeros", "zesty", "zones"
-]
+])
+
+# CSPRNG backed by os.urandom (same source as the secrets module)
+_SYSTEM_RANDOM = random.SystemRandom()
+
+
+def _zeroize(buffer: bytearray) -> None:
+    """Overwrite a mutable buffer holding secret bytes with zeros, in place."""
+    if buffer:
+        ctypes.memset((ctypes.c_char * len(buffer)).from_buffer(buffer), 0, len(buffer))
 
 
 class AgeEncryptionExtension(GObject.GObject, Nautilus.MenuProvider):
@@ -286,8 +344,15 @@ class AgeEncryptionExtension(GObject.GObject, Nautilus.MenuProvider):
         # Cache for mat2 availability check
         self._mat2_checked: bool = False
         self._mat2_available: Optional[bool] = None
+        # Cache for archive compressor detection: tar compress program
+        self._compressor: Optional[str] = None
+        # Cache for storage type detection: st_dev -> True if non-rotational (SSD)
+        self._ssd_devices: Dict[int, bool] = {}
+        # Cache for resolved tool paths: name -> absolute path
+        self._tool_paths: dict = {}
         # Rate limiting: track failed decryption attempts per file
-        self._failed_attempts: Dict[str, List[float]] = defaultdict(list)
+        # (bounded LRU: least recently failing files are evicted first)
+        self._failed_attempts: 'OrderedDict[str, List[float]]' = OrderedDict()
 
     def validate_path(self, path: str) -> bool:
         """Validate that a path is safe (no traversal attacks).
@@ -298,32 +363,45 @@ class AgeEncryptionExtension(GObject.GObject, Nautilus.MenuProvider):
         Returns:
             True if the path is safe, False otherwise
         """
+        return self.resolve_and_validate(path) is not None
+
+    def resolve_and_validate(self, path: str) -> Optional[str]:
+        """Resolve a path and validate it is safe (no traversal attacks).
+
+        Callers that go on to use the path should use the returned resolved
+        path instead of resolving it again.
+
+        Args:
+            path: The path to validate
+
+        Returns:
+            The resolved path if it is safe, None otherwise
+        """
         # Must be absolute path
         if not os.path.isabs(path):
             logger.warning(f"Path validation failed: not absolute: {path}")
-            return False
+            return None
 
         # Resolve the path to catch symlink attacks
         try:
             resolved = os.path.realpath(path)
         except (OSError, ValueError) as e:
             logger.warning(f"Path validation failed: cannot resolve: {e}")
-            return False
+            return None
 
         # Check for path traversal (.. components after resolution)
         # A resolved path should not contain '..'
-        if '..' in resolved.split(os.sep):
+        parent_ref = os.sep + '..'
+        if parent_ref + os.sep in resolved or resolved.endswith(parent_ref):
             logger.warning(f"Path validation failed: traversal detected: {path}")
-            return False
+            return None
 
         # Don't allow operations on critical system directories
-        dangerous_prefixes = ['/bin', '/sbin', '/usr', '/etc', '/var', '/boot', '/root']
-        for prefix in dangerous_prefixes:
-            if resolved.startswith(prefix + os.sep) or resolved == prefix:
-                logger.warning(f"Path validation failed: system directory: {resolved}")
-                return False
+        if resolved in SYSTEM_DIRECTORIES or resolved.startswith(SYSTEM_DIRECTORY_PREFIXES):
+            logger.warning(f"Path validation failed: system directory: {resolved}")
+            return None
 
-        return True
+        return resolved
 
     def check_rate_limit(self, file_path: str) -> bool:
         """Check if decryption is rate limited for this file.
@@ -334,11 +412,16 @@ class AgeEncryptionExtension(GObject.GObject, Nautilus.MenuProvider):
         Returns:
             True if allowed to proceed, False if rate limited
         """
-        now = time.time()
-        attempts = self._failed_attempts[file_path]
+        attempts = self._failed_attempts.get(file_path)
+        if not attempts:
+            return True
 
-        # Clean old attempts (outside the window)
+        # Clean old attempts (outside the window), dropping empty entries
+        now = time.time()
         attempts = [t for t in attempts if now - t < RATE_LIMIT_WINDOW_SECONDS]
+        if not attempts:
+            del self._failed_attempts[file_path]
+            return True
         self._failed_attempts[file_path] = attempts
 
         if len(attempts) >= RATE_LIMIT_MAX_ATTEMPTS:
@@ -352,7 +435,10 @@ class AgeEncryptionExtension(GObject.GObject, Nautilus.MenuProvider):
 
     def record_failed_attempt(self, file_path: str) -> None:
         """Record a failed decryption attempt for rate limiting."""
-        self._failed_attempts[file_path].append(time.time())
+        self._failed_attempts.setdefault(file_path, []).append(time.time())
+        self._failed_attempts.move_to_end(file_path)
+        while len(self._failed_attempts) > RATE_LIMIT_MAX_TRACKED_FILES:
+            self._failed_attempts.popitem(last=False)
 
     def clear_failed_attempts(self, file_path: str) -> None:
         """Clear failed attempts after successful decryption."""
@@ -364,14 +450,8 @@ class AgeEncryptionExtension(GObject.GObject, Nautilus.MenuProvider):
             return self._age_available
 
         self._dependencies_checked = True
-        try:
-            subprocess.run(['age', '--version'],
-                         capture_output=True,
-                         check=True,
-                         timeout=2)
-            self._age_available = True
-        except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
-            self._age_available = False
+        # PATH lookup only: runs on the Nautilus main loop, so never fork here
+        self._age_available = os.path.isabs(self._tool('age'))
 
         return self._age_available
 
@@ -385,18 +465,198 @@ class AgeEncryptionExtension(GObject.GObject, Nautilus.MenuProvider):
             return self._mat2_available
 
         self._mat2_checked = True
+        self._mat2_available = os.path.isabs(self._tool('mat2'))
+
+        return self._mat2_available
+
+    def _tool(self, name: str) -> str:
+        """Resolve a command-line tool to its absolute path (lazy check with cache).
+
+        Spares a PATH search on every exec in batch operations. An absolute
+        executable plus close_fds=False also lets subprocess start children
+        with posix_spawn() instead of fork() on every supported Python (3.8+).
+        close_fds=False is only safe in the standalone workers, where every fd
+        comes from Python and is non-inheritable (PEP 446). Launches inside
+        Nautilus (show_error) keep the default: GTK and GLib open fds that a
+        child could inherit. Launches that need pass_fds or start_new_session
+        still fork.
+
+        Args:
+            name: Command name, e.g. 'age'
+
+        Returns:
+            Absolute path of the tool, or the bare name if it is not on PATH
+            (so running it still fails with FileNotFoundError at first use)
+        """
+        path = self._tool_paths.get(name)
+        if path is None:
+            path = self._tool_paths[name] = shutil.which(name) or name
+        return path
+
+    def get_compressor(self) -> str:
+        """Select the fastest available archive compressor (lazy check with cache).
+
+        Returns:
+            Compress program for tar --use-compress-program
+        """
+        if self._compressor is not None:
+            return self._compressor
+
+        for binary, program in ARCHIVE_COMPRESSORS:
+            if shutil.which(binary):
+                self._compressor = program
+                break
+        else:
+            # Nothing found on PATH: let tar report the missing gzip
+            self._compressor = 'gzip'
+
+        return self._compressor
+
+    def create_staging_dir(self, output_dir: str) -> str:
+        """Create a private temp directory for building an encrypted bundle.
+
+        Prefers a hidden directory inside output_dir: being on the same
+        filesystem as the sources lets cp clone them (reflink) and the final
+        move is a plain rename. Falls back to the system temp directory.
+
+        Args:
+            output_dir: Directory where the encrypted file will be placed
+
+        Returns:
+            Path of the created directory
+        """
         try:
-            subprocess.run(
-                ['mat2', '--version'],
-                capture_output=True,
-                check=True,
-                timeout=2
+            return tempfile.mkdtemp(prefix='.age_bundle_', dir=output_dir)
+        except OSError:
+            return tempfile.mkdtemp(prefix='age_bundle_')
+
+    def remove_staging_dir(self, temp_dir: str, shred_files: bool) -> None:
+        """Remove a staging directory created by create_staging_dir().
+
+        The staged copies are plaintext and, in the preferred layout, live on
+        the user's filesystem next to the sources. When the originals are
+        being securely deleted, the copies are shredded too before removal.
+
+        Args:
+            temp_dir: Staging directory to remove
+            shred_files: Whether to secure_delete() regular files first
+        """
+        if shred_files:
+            for root, _, files in os.walk(temp_dir):
+                for name in files:
+                    file_path = os.path.join(root, name)
+                    # Never follow a staged symlink to its target
+                    if not os.path.islink(file_path):
+                        self.secure_delete(file_path)
+
+        try:
+            shutil.rmtree(temp_dir)
+        except OSError:
+            pass
+
+    def prepare_archive_members(self, items: List[Tuple[str, bool, bool]], temp_dir: str,
+                                clean_metadata: bool) -> Tuple[List[Tuple[str, str]], int]:
+        """Decide what tar will archive for a set of selected items.
+
+        mat2 cleans files in place, so with metadata cleaning the items are
+        first copied into a 'bundle' directory inside temp_dir. Without it
+        the originals are archived directly and nothing is copied.
+
+        Args:
+            items: Classified sources, as returned by classify_paths()
+            temp_dir: Private temp directory for the staged copies
+            clean_metadata: Whether to clean metadata with mat2
+
+        Returns:
+            Tuple of (archive members as (directory, name) pairs, cleaned file count)
+
+        Raises:
+            FileNotFoundError: If a source does not exist
+            RuntimeError: If copying fails
+        """
+        for item_path, is_dir, is_file in items:
+            if not (is_dir or is_file):
+                raise FileNotFoundError(f"Source path does not exist: {item_path}")
+
+        if not clean_metadata:
+            # './' keeps names starting with '-' from being read as tar options
+            return ([(os.path.dirname(item_path), os.path.join('.', os.path.basename(item_path)))
+                     for item_path, _, _ in items], 0)
+
+        bundle_dir = os.path.join(temp_dir, 'bundle')
+        os.mkdir(bundle_dir)
+
+        # Copy all items to temp using external cp command
+        # (--reflink=auto makes the copy a metadata-only clone on btrfs/xfs)
+        for item_path, _, _ in items:
+            dest = os.path.join(bundle_dir, os.path.basename(item_path))
+            result = subprocess.run(
+                [self._tool('cp'), '-a', '--reflink=auto', '--', item_path, dest],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                close_fds=False
             )
-            self._mat2_available = True
-        except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
-            self._mat2_available = False
+            if result.returncode != 0:
+                stderr = result.stderr.decode('utf-8', errors='replace')
+                raise RuntimeError(f"cp failed for {item_path}: {stderr}")
 
-        return self._mat2_available
+        return ([(bundle_dir, '.')], self.clean_metadata_tree(bundle_dir))
+
+    def encrypt_archive(self, members: List[Tuple[str, str]], output_path: str,
+                        password: str) -> bool:
+        """Archive files and folders and encrypt the archive with age.
+
+        tar writes the compressed archive to a pipe that age reads directly,
+        so the archive is never written to disk before encryption.
+
+        Args:
+            members: (directory, name) pairs; each name is archived relative to its directory
+            output_path: Path of the encrypted file to create
+            password: Passphrase for age
+
+        Returns:
+            True if encryption succeeded, False otherwise
+
+        Raises:
+            RuntimeError: If tar fails
+        """
+        program = self.get_compressor()
+        tar_cmd = [self._tool('tar'), '--use-compress-program', program, '-cf', '-']
+        for directory, name in members:
+            tar_cmd += ['-C', directory, name]
+
+        with tempfile.TemporaryFile() as tar_stderr:
+            tar_process = subprocess.Popen(tar_cmd, stdin=subprocess.DEVNULL,
+                                           stdout=subprocess.PIPE, stderr=tar_stderr,
+                                           close_fds=False)
+
+            tar_stdout = tar_process.stdout
+            try:
+                if tar_stdout is None:
+                    raise RuntimeError("tar output pipe was not created")
+                # age reads the archive from the inherited pipe fd, while the
+                # passphrase still goes through the PTY. No timeout: duration
+                # depends on the size of the data being archived.
+                tar_fd = tar_stdout.fileno()
+                success = self.encrypt_file(f'/dev/fd/{tar_fd}', output_path, password,
+                                            pass_fds=(tar_fd,), timeout=None)
+            finally:
+                # Close our read end so tar gets SIGPIPE if age stopped reading
+                if tar_stdout is not None:
+                    tar_stdout.close()
+                tar_process.wait()
+
+            if tar_process.returncode != 0:
+                # The encrypted output (if any) holds a truncated archive
+                try:
+                    os.remove(output_path)
+                except FileNotFoundError:
+                    pass
+                tar_stderr.seek(0)
+                stderr = tar_stderr.read().decode('utf-8', errors='replace')
+                raise RuntimeError(f"tar failed: {stderr}")
+
+        return success
 
     def get_file_items(self, *args) -> List:
         """Entry point for context menu items"""
@@ -445,19 +705,41 @@ class AgeEncryptionExtension(GObject.GObject, Nautilus.MenuProvider):
             items.append(self.create_decrypt_menu_item(paths))
         else:
             # Menu for encryption (handles both files and folders)
-            items.append(self.create_encrypt_menu_item(paths))
+            # Classify once (one stat per path) and share with both items
+            classified = self.classify_paths(paths)
+            items.append(self.create_encrypt_menu_item(classified))
 
             # Add HSM option if PKCS#11 module is available
             if self.find_pkcs11_module():
-                items.append(self.create_encrypt_hsm_menu_item(paths))
+                items.append(self.create_encrypt_hsm_menu_item(classified))
 
         return items
     
-    def create_encrypt_menu_item(self, paths: List[str]) -> 'Nautilus.MenuItem':
+    def classify_paths(self, paths: List[str]) -> List[Tuple[str, bool, bool]]:
+        """Classify paths as folders/files with a single stat() per path.
+
+        Args:
+            paths: Paths to classify
+
+        Returns:
+            List of (path, is_dir, is_file); both False if the path is missing
+        """
+        classified = []
+        for path in paths:
+            try:
+                mode = os.stat(path).st_mode
+            except OSError:
+                classified.append((path, False, False))
+                continue
+            classified.append((path, stat.S_ISDIR(mode), stat.S_ISREG(mode)))
+        return classified
+
+    def create_encrypt_menu_item(self, classified: List[Tuple[str, bool, bool]]) -> 'Nautilus.MenuItem':
         """Create menu item for encryption (files and/or folders)"""
+        paths = [path for path, _, _ in classified]
         # Count files and folders
-        num_files = sum(1 for p in paths if os.path.isfile(p))
-        num_folders = sum(1 for p in paths if os.path.isdir(p))
+        num_files = sum(1 for _, _, is_file in classified if is_file)
+        num_folders = sum(1 for _, is_dir, _ in classified if is_dir)
 
         if len(paths) == 1:
             if num_folders == 1:
@@ -480,14 +762,15 @@ class AgeEncryptionExtension(GObject.GObject, Nautilus.MenuProvider):
         item.connect('activate', lambda menu, p=list(paths): self.on_encrypt_items(menu, p))
         return item
 
-    def create_encrypt_hsm_menu_item(self, paths: List[str]) -> 'Nautilus.MenuItem':
+    def create_encrypt_hsm_menu_item(self, classified: List[Tuple[str, bool, bool]]) -> 'Nautilus.MenuItem':
         """Create menu item for HSM-based encryption.
 
         Only shown when PKCS#11 module (SafeNet eToken) is detected.
         """
+        paths = [path for path, _, _ in classified]
         # Count files and folders for dynamic label
-        num_files = sum(1 for p in paths if os.path.isfile(p))
-        num_folders = sum(1 for p in paths if os.path.isdir(p))
+        num_files = sum(1 for _, _, is_file in classified if is_file)
+        num_folders = sum(1 for _, is_dir, _ in classified if is_dir)
 
         if len(paths) == 1:
             if num_folders == 1:
@@ -525,13 +808,13 @@ class AgeEncryptionExtension(GObject.GObject, Nautilus.MenuProvider):
         item.connect('activate', lambda menu, p=list(paths): self.on_decrypt_files(menu, p))
         return item
 
-    def get_path_from_uri(self, uri: str) -> str:
-        """Convert URI to system path"""
+    def get_path_from_uri(self, uri: str) -> Optional[str]:
+        """Convert URI to system path (None for non-local URIs)"""
         try:
-            parsed = urlparse(uri)
-            path = unquote(parsed.path)
+            # GLib decodes the URI in C; returns (filename, hostname)
+            path: str = GLib.filename_from_uri(uri)[0]
             return path
-        except (ValueError, TypeError) as e:
+        except (GLib.Error, TypeError) as e:
             logger.warning(f"URI parsing error: {e}")
             return None
     
@@ -589,7 +872,7 @@ class AgeEncryptionExtension(GObject.GObject, Nautilus.MenuProvider):
             wrapped = '\n'.join(passphrase[i:i+70] for i in range(0, len(passphrase), 70))
 
             zenity_process = subprocess.Popen(
-                ['zenity', '--question',
+                [self._tool('zenity'), '--question',
                  '--title', 'HSM Passphrase',
                  '--text', '📋 HSM Passphrase copied to clipboard!\n\n'
                           f'<tt>{wrapped}</tt>\n\n'
@@ -600,8 +883,9 @@ class AgeEncryptionExtension(GObject.GObject, Nautilus.MenuProvider):
                  '--extra-button', 'Encrypt & Delete original',
                  '--width', '600'],
                 stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
+                stderr=subprocess.DEVNULL,
+                text=True,
+                close_fds=False
             )
 
             stdout, _ = zenity_process.communicate(timeout=300)
@@ -636,8 +920,14 @@ class AgeEncryptionExtension(GObject.GObject, Nautilus.MenuProvider):
         )
         # Returns IMMEDIATELY - Nautilus stays 100% responsive
 
-    def encrypt_file(self, input_path: str, output_path: str, password: str) -> bool:
-        """Encrypt a file with age securely using PTY"""
+    def encrypt_file(self, input_path: str, output_path: str, password: str,
+                     pass_fds: Tuple[int, ...] = (),
+                     timeout: Optional[float] = 120) -> bool:
+        """Encrypt a file with age securely using PTY
+
+        age has no non-interactive passphrase input (no env var or file
+        option), so the PTY is required for passphrase mode.
+        """
         master_fd = None
         slave_fd = None
         process = None
@@ -647,27 +937,31 @@ class AgeEncryptionExtension(GObject.GObject, Nautilus.MenuProvider):
             master_fd, slave_fd = pty.openpty()
 
             process = subprocess.Popen(
-                ['age', '-p', '-o', output_path, input_path],
+                [self._tool('age'), '-p', '-o', output_path, input_path],
                 stdin=slave_fd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
+                stdout=subprocess.DEVNULL,  # age writes to -o, stdout stays empty
+                stderr=subprocess.PIPE,
+                pass_fds=pass_fds
             )
 
             # Close slave in parent process
             os.close(slave_fd)
             slave_fd = None
 
-            # Small pause for age to be ready to receive input
-            time.sleep(0.1)
-
             # age -p asks for password twice (entry + confirmation)
             # Security note: password is written directly to PTY fd, never logged
-            os.write(master_fd, f"{password}\n".encode('utf-8'))
-            time.sleep(0.1)
-            os.write(master_fd, f"{password}\n".encode('utf-8'))
+            # Both answers go in a single write: the terminal queues the second
+            # line until age reads it for the confirmation prompt
+            self._wait_for_prompt(master_fd, b'passphrase')
+            # writev() sends the buffer twice without building a bigger copy
+            password_bytes = bytearray(password, 'utf-8')
+            try:
+                os.writev(master_fd, [password_bytes, b'\n', password_bytes, b'\n'])
+            finally:
+                _zeroize(password_bytes)  # Wipe the encoded buffer we own
 
             # 120s timeout - age encryption is fast, longer waits indicate problems
-            stdout, stderr = process.communicate(timeout=120)
+            _, stderr = self._drain(process, timeout)
 
             if process.returncode == 0 and os.path.exists(output_path):
                 return True
@@ -675,11 +969,10 @@ class AgeEncryptionExtension(GObject.GObject, Nautilus.MenuProvider):
                 err_msg = stderr.decode('utf-8', errors='replace')
                 logger.error(f"Age encryption failed (code {process.returncode}): {err_msg}")
                 # Clean up partial output file if exists
-                if os.path.exists(output_path):
-                    try:
-                        os.remove(output_path)
-                    except OSError:
-                        pass
+                try:
+                    os.unlink(output_path)
+                except OSError:
+                    pass
                 return False
 
         except subprocess.TimeoutExpired:
@@ -707,9 +1000,106 @@ class AgeEncryptionExtension(GObject.GObject, Nautilus.MenuProvider):
                 except OSError:
                     pass
 
-    def decrypt_file(self, input_path: str, output_path: str, password: str) -> bool:
-        """Decrypt a .age file securely using PTY"""
-        import time
+    def _wait_for_prompt(self, master_fd: int, needle: bytes,
+                         timeout: float = AGE_PROMPT_TIMEOUT) -> bool:
+        """Wait until age prints a prompt containing needle on the PTY.
+
+        Replaces fixed sleeps: the passphrase is written as soon as age is
+        actually reading it.
+
+        Args:
+            master_fd: PTY master file descriptor
+            needle: Bytes expected in the prompt (e.g. b'passphrase')
+            timeout: Maximum seconds to wait
+
+        Returns:
+            True if the prompt was seen, False on timeout or EOF
+            (callers write anyway, as before)
+        """
+        flags = fcntl.fcntl(master_fd, fcntl.F_GETFL)
+        fcntl.fcntl(master_fd, fcntl.F_SETFL, flags | os.O_NONBLOCK)
+
+        buffer = b''
+        deadline = time.monotonic() + timeout
+        while needle not in buffer:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            ready, _, _ = select.select([master_fd], [], [], remaining)
+            if not ready:
+                continue
+            try:
+                chunk = os.read(master_fd, 4096)
+            except BlockingIOError:
+                continue
+            except OSError:
+                return False  # EIO: age closed the terminal
+            if not chunk:
+                return False
+            buffer += chunk
+        return True
+
+    def _drain(self, process: subprocess.Popen,
+               timeout: Optional[float]) -> Tuple[bytes, bytes]:
+        """Read a process's stdout/stderr pipes until EOF, then reap it.
+
+        Lighter replacement for communicate(): age prints little or nothing,
+        so a plain select()/os.read() loop is enough.
+
+        Args:
+            process: Process started with stdout/stderr pipes (either may be None)
+            timeout: Maximum seconds for the whole call, None to wait forever
+
+        Returns:
+            Tuple of (stdout bytes, stderr bytes)
+
+        Raises:
+            subprocess.TimeoutExpired: If the process outlives the timeout
+        """
+        start = time.monotonic()
+        pipes = [pipe for pipe in (process.stdout, process.stderr) if pipe is not None]
+        buffers = {pipe.fileno(): bytearray() for pipe in pipes}
+
+        open_fds = list(buffers)
+        while open_fds:
+            remaining = None
+            if timeout is not None:
+                remaining = timeout - (time.monotonic() - start)
+                if remaining <= 0:
+                    raise subprocess.TimeoutExpired(process.args, timeout)
+            ready, _, _ = select.select(open_fds, [], [], remaining)
+            for fd in ready:
+                chunk = os.read(fd, 65536)
+                if chunk:
+                    buffers[fd] += chunk
+                else:
+                    open_fds.remove(fd)
+
+        remaining = None
+        if timeout is not None:
+            remaining = max(timeout - (time.monotonic() - start), 0)
+        process.wait(timeout=remaining)
+
+        output = []
+        for pipe in (process.stdout, process.stderr):
+            if pipe is None:
+                output.append(b'')
+            else:
+                output.append(bytes(buffers[pipe.fileno()]))
+                pipe.close()
+        stdout, stderr = output
+        return stdout, stderr
+
+    def decrypt_file(self, input_path: str, output_path: str,
+                     password: str) -> Tuple[bool, Optional[str]]:
+        """Decrypt a .age file securely using PTY
+
+        Returns:
+            Tuple of (success, error_message)
+            - (True, None) if decryption succeeded
+            - (False, "error") if it failed; age's own message when age ran,
+              e.g. containing AGE_WRONG_PASSPHRASE
+        """
         master_fd = None
         slave_fd = None
         process = None
@@ -719,66 +1109,66 @@ class AgeEncryptionExtension(GObject.GObject, Nautilus.MenuProvider):
             master_fd, slave_fd = pty.openpty()
 
             process = subprocess.Popen(
-                ['age', '-d', '-o', output_path, input_path],
+                [self._tool('age'), '-d', '-o', output_path, input_path],
                 stdin=slave_fd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
+                stdout=subprocess.DEVNULL,  # age writes to -o, stdout stays empty
+                stderr=subprocess.PIPE,
+                close_fds=False
             )
 
             # Close slave in parent process
             os.close(slave_fd)
             slave_fd = None
 
-            # Small pause for age to be ready to receive input
-            time.sleep(0.1)
+            self._wait_for_prompt(master_fd, b'passphrase')
 
             # age -d asks for password once
             # Security note: password is written directly to PTY fd, never logged
-            os.write(master_fd, f"{password}\n".encode('utf-8'))
+            password_bytes = bytearray(password, 'utf-8')
+            try:
+                os.writev(master_fd, [password_bytes, b'\n'])
+            finally:
+                _zeroize(password_bytes)  # Wipe the encoded buffer we own
 
             # 120s timeout - age decryption is fast, longer waits indicate problems
-            stdout, stderr = process.communicate(timeout=120)
+            _, stderr = self._drain(process, 120)
 
             if process.returncode == 0 and os.path.exists(output_path):
-                return True
+                return (True, None)
             else:
                 err_msg = stderr.decode('utf-8', errors='replace')
                 logger.error(f"Age decryption failed (code {process.returncode}): {err_msg}")
                 # Delete failed output file
-                if os.path.exists(output_path):
-                    try:
-                        os.remove(output_path)
-                    except OSError:
-                        pass
-                return False
+                try:
+                    os.unlink(output_path)
+                except OSError:
+                    pass
+                return (False, err_msg)
 
         except subprocess.TimeoutExpired:
             logger.error("Decryption timeout")
             if process:
                 process.kill()
                 process.wait()  # Prevent zombie process
-            if os.path.exists(output_path):
-                try:
-                    os.remove(output_path)
-                except OSError:
-                    pass
-            return False
+            try:
+                os.unlink(output_path)
+            except OSError:
+                pass
+            return (False, "Decryption timeout")
         except OSError as e:
             logger.error(f"Decryption OS error: {e}")
-            if os.path.exists(output_path):
-                try:
-                    os.remove(output_path)
-                except OSError:
-                    pass
-            return False
+            try:
+                os.unlink(output_path)
+            except OSError:
+                pass
+            return (False, str(e))
         except Exception as e:
             logger.error(f"Decryption error: {e}")
-            if os.path.exists(output_path):
-                try:
-                    os.remove(output_path)
-                except OSError:
-                    pass
-            return False
+            try:
+                os.unlink(output_path)
+            except OSError:
+                pass
+            return (False, str(e))
         finally:
             # Clean up file descriptors
             if master_fd is not None:
@@ -792,36 +1182,244 @@ class AgeEncryptionExtension(GObject.GObject, Nautilus.MenuProvider):
                 except OSError:
                     pass
 
+    def extract_archive(self, archive_path: str, dest_dir: str, magic: bytes) -> None:
+        """Extract a compressed tar archive with zip-slip protection.
+
+        Every member is validated in a first pass over the archive, so an
+        unsafe archive is rejected before anything is written (like the
+        'tar -t' check before 'tar -x'). The second pass extracts in-process.
+
+        Args:
+            archive_path: Path to the archive
+            dest_dir: Directory to extract into
+            magic: First bytes of the archive (selects the decompressor)
+
+        Raises:
+            tarfile.TarError: If the archive is invalid
+            ValueError: If the archive contains unsafe members
+            subprocess.CalledProcessError: If the zstd decompressor fails
+        """
+        with self._open_archive(archive_path, magic) as tf:
+            for _ in self._validated_members(tf, dest_dir):
+                pass
+        with self._open_archive(archive_path, magic) as tf:
+            self._extract_members(tf, dest_dir)
+
+    @contextlib.contextmanager
+    def _open_archive(self, archive_path: str, magic: bytes) -> Iterator[tarfile.TarFile]:
+        """Open a gzip or zstd compressed tar archive for reading.
+
+        Raises:
+            subprocess.CalledProcessError: If the zstd decompressor fails
+        """
+        if magic.startswith(GZIP_MAGIC):
+            with tarfile.open(archive_path, 'r:gz') as tf:
+                yield tf
+            return
+
+        # tarfile cannot read zstd: stream the decompressed archive through a pipe
+        zstd_cmd = [self._tool('zstd'), '-dc', '--', archive_path]
+        zstd_process = subprocess.Popen(zstd_cmd, stdin=subprocess.DEVNULL,
+                                        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                        close_fds=False)
+        zstd_stdout = zstd_process.stdout
+        if zstd_stdout is None:
+            raise RuntimeError("zstd output pipe was not created")
+        try:
+            with tarfile.open(fileobj=zstd_stdout, mode='r|') as tf:
+                yield tf
+            # Read the tar padding past the end-of-archive marker, so zstd
+            # doesn't fail on a closed pipe
+            while zstd_stdout.read(IO_CHUNK_SIZE):
+                pass
+        finally:
+            zstd_stdout.close()
+            zstd_process.wait()
+        if zstd_process.returncode != 0:
+            raise subprocess.CalledProcessError(zstd_process.returncode, zstd_cmd)
+
+    def _extract_members(self, tf: tarfile.TarFile, dest_dir: str) -> None:
+        """Extract all members of an already validated archive into dest_dir.
+
+        Uses tarfile's 'tar' filter where available: like 'tar -x' it keeps
+        symlinks as they are, and it also re-checks that no member is written
+        outside dest_dir and drops setuid and group/other write bits.
+        """
+        if hasattr(tarfile, 'tar_filter'):
+            tf.extractall(path=dest_dir, filter='tar')
+        else:
+            tf.extractall(path=dest_dir)
+
+    def _validated_members(self, tf: tarfile.TarFile,
+                           dest_dir: str) -> Iterator[tarfile.TarInfo]:
+        """Yield archive members, raising on the first unsafe one (zip-slip).
+
+        Symlinks are extracted as plain link entries, whatever they point
+        to (as 'tar -x' does), but no member may be written through one.
+
+        Raises:
+            ValueError: If a member path or hard link target escapes the
+                destination, a member goes through a symlink of the archive,
+                or the member is a device file
+        """
+        dest_real = os.path.realpath(dest_dir)
+        symlinks: Set[str] = set()
+        for member in tf:
+            name = os.path.normpath(member.name)
+            if not self._is_within(dest_real, os.path.join(dest_real, name)):
+                raise ValueError(f"Suspicious path in archive: {member.name}")
+            if self._has_symlink_parent(name, symlinks):
+                raise ValueError(f"Path through a link in archive: {member.name}")
+            if member.issym():
+                symlinks.add(name)
+            elif member.islnk():
+                # Hard link targets are archive paths and must exist inside it
+                target = os.path.normpath(member.linkname)
+                if (os.path.isabs(member.linkname)
+                        or not self._is_within(dest_real, os.path.join(dest_real, target))
+                        or self._has_symlink_parent(target, symlinks)):
+                    raise ValueError(f"Suspicious link in archive: {member.name}")
+            if member.isdev():
+                raise ValueError(f"Device file in archive: {member.name}")
+            yield member
+
+    def _has_symlink_parent(self, name: str, symlinks: Set[str]) -> bool:
+        """Check if any parent directory of an archive path is one of the symlinks."""
+        parent = os.path.dirname(name)
+        while parent:
+            if parent in symlinks:
+                return True
+            parent = os.path.dirname(parent)
+        return False
+
+    def _is_within(self, dest_real: str, path: str) -> bool:
+        """Check that path, once resolved, stays inside the resolved dest_real."""
+        return os.path.commonpath([os.path.realpath(path), dest_real]) == dest_real
+
     def verify_age_file(self, file_path: str) -> bool:
         """Verify if a file is a valid .age file"""
         try:
-            # Read age file header
+            # Read only the magic itself, whatever the file size
             with open(file_path, 'rb') as f:
-                header = f.read(100)
-                # age files start with "age-encryption.org/v1"
-                return b'age-encryption.org/v1' in header
+                return f.read(len(AGE_MAGIC)) == AGE_MAGIC
         except (OSError, IOError) as e:
             logger.warning(f"File verification error: {e}")
             return False
 
     def secure_delete(self, file_path: str) -> None:
-        """Delete a file securely using shred"""
+        """Delete a file securely using shred (plain unlink on SSDs)"""
+        if self._is_on_ssd(file_path):
+            # Overwriting flash storage never reaches the original cells because
+            # of wear leveling; it only costs writes and flash wear
+            try:
+                os.unlink(file_path)
+            except OSError as e:
+                logger.error(f"Delete error: {e}")
+            return
+
         try:
-            # -v: verbose, -f: force, -z: add final zero pass, -u: REMOVE file after
-            # -n 3: 3 passes (sufficient for SSDs, 10 is excessive)
+            # -f: force, -u: truncate and REMOVE file after overwriting
+            # -n 1: a single random pass (NIST SP 800-88); extra passes only add writes
             subprocess.run(
-                ['shred', '-vfzu', '-n', '3', file_path],
+                [self._tool('shred'), '-fu', '-n', '1', file_path],
                 check=True,
-                capture_output=True
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                close_fds=False
             )
-        except subprocess.CalledProcessError as e:
+        except (subprocess.CalledProcessError, FileNotFoundError) as e:
             logger.warning(f"Secure delete error: {e}")
-            # Fallback to normal rm if shred fails
+            # Fallback: overwrite in-process, then remove
+            try:
+                self._overwrite_random(file_path)
+            except OSError as overwrite_error:
+                logger.warning(f"Fallback overwrite failed: {overwrite_error}")
             try:
                 os.remove(file_path)
             except OSError as rm_error:
                 logger.error(f"Fallback delete also failed: {rm_error}")
 
+    def _overwrite_random(self, file_path: str) -> None:
+        """Overwrite a file's contents once with random data, like shred -n 1.
+
+        Args:
+            file_path: File to overwrite (it is not removed)
+
+        Raises:
+            OSError: If the file cannot be opened or written
+        """
+        fd = os.open(file_path, os.O_WRONLY)
+        try:
+            size = os.fstat(fd).st_size
+            # One random buffer reused for every chunk, as shred does
+            random_chunk = os.urandom(min(size, IO_CHUNK_SIZE))
+            offset = 0
+            while offset < size:
+                chunk = random_chunk[:size - offset]
+                offset += os.pwrite(fd, chunk, offset)
+            os.fdatasync(fd)
+            # The data is on disk: drop it from the page cache as well
+            os.posix_fadvise(fd, 0, size, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+
+    def _is_on_ssd(self, file_path: str) -> bool:
+        """Check if a file lives on a non-rotational block device (cached per device).
+
+        Args:
+            file_path: File to check
+
+        Returns:
+            True only if the device reports itself as non-rotational. Unknown
+            devices (tmpfs, network filesystems, ...) return False so that
+            they keep getting shredded.
+        """
+        try:
+            st_dev = os.stat(file_path).st_dev
+        except OSError:
+            return False
+
+        if st_dev not in self._ssd_devices:
+            self._ssd_devices[st_dev] = self._read_rotational(st_dev) == '0'
+        return self._ssd_devices[st_dev]
+
+    def _read_rotational(self, st_dev: int) -> Optional[str]:
+        """Read the sysfs rotational flag of the block device behind st_dev.
+
+        Args:
+            st_dev: Device number of a filesystem (as in os.stat().st_dev)
+
+        Returns:
+            '0' for SSD/NVMe, '1' for HDD, or None if it cannot be determined
+        """
+        dev = f"{os.major(st_dev)}:{os.minor(st_dev)}"
+        if not os.path.exists(f"/sys/dev/block/{dev}"):
+            # Filesystems such as btrfs report an anonymous st_dev: find the
+            # source device of that mount in mountinfo instead
+            try:
+                with open('/proc/self/mountinfo') as f:
+                    for line in f:
+                        fields = line.split()
+                        if fields[2] == dev and ' - ' in line:
+                            source = line.split(' - ', 1)[1].split()[1]
+                            rdev = os.stat(source).st_rdev
+                            dev = f"{os.major(rdev)}:{os.minor(rdev)}"
+                            break
+                    else:
+                        return None
+            except (OSError, IndexError):
+                return None
+
+        # Partitions have no queue/ of their own: it lives on the parent disk
+        sys_dev = os.path.realpath(f"/sys/dev/block/{dev}")
+        for candidate in (sys_dev, os.path.dirname(sys_dev)):
+            try:
+                with open(os.path.join(candidate, 'queue', 'rotational')) as f:
+                    return f.read().strip()
+            except OSError:
+                continue
+        return None
+
     def clean_metadata(self, file_path: str) -> Tuple[Optional[str], Optional[str]]:
         """Clean metadata from a file using mat2, preserving original.
 
@@ -836,10 +1434,11 @@ class AgeEncryptionExtension(GObject.GObject, Nautilus.MenuProvider):
             - (path, None) if successful - path to cleaned temp file
             - (None, "error") if failed
         """
-        if not self.validate_path(file_path):
+        resolved = self.resolve_and_validate(file_path)
+        if resolved is None:
             return (None, "Invalid file path")
 
-        if not os.path.isfile(file_path):
+        if not os.path.isfile(resolved):
             return (None, "Not a file")
 
         temp_path = None
@@ -850,14 +1449,16 @@ class AgeEncryptionExtension(GObject.GObject, Nautilus.MenuProvider):
             os.close(fd)
 
             # Copy original to temp (preserves content but not necessarily all metadata)
-            shutil.copy2(file_path, temp_path)
+            shutil.copy2(resolved, temp_path)
 
             # Clean metadata on temp copy only
             result = subprocess.run(
-                ['mat2', '--inplace', '--unknown-members', 'omit', temp_path],
-                capture_output=True,
+                [self._tool('mat2'), '--inplace', '--unknown-members', 'omit', temp_path],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
                 timeout=60,
-                text=True
+                text=True,
+                close_fds=False
             )
 
             # mat2 return codes:
@@ -868,40 +1469,101 @@ class AgeEncryptionExtension(GObject.GObject, Nautilus.MenuProvider):
                 return (temp_path, None)
             else:
                 # Cleanup on error
-                if os.path.exists(temp_path):
-                    os.remove(temp_path)
+                try:
+                    os.unlink(temp_path)
+                except OSError:
+                    pass
                 err_msg = result.stderr.strip() if result.stderr else "Unknown error"
                 logger.warning(f"mat2 failed on {file_path}: {err_msg}")
                 return (None, err_msg)
 
         except subprocess.TimeoutExpired:
             logger.error(f"mat2 timeout on: {file_path}")
-            if temp_path and os.path.exists(temp_path):
-                os.remove(temp_path)
+            if temp_path:
+                try:
+                    os.unlink(temp_path)
+                except OSError:
+                    pass
             return (None, "Timeout cleaning metadata")
 
         except FileNotFoundError:
             logger.error("mat2 not found")
-            if temp_path and os.path.exists(temp_path):
-                os.remove(temp_path)
+            if temp_path:
+                try:
+                    os.unlink(temp_path)
+                except OSError:
+                    pass
             return (None, "mat2 not installed")
 
         except OSError as e:
             logger.error(f"mat2 error on {file_path}: {e}")
-            if temp_path and os.path.exists(temp_path):
-                os.remove(temp_path)
+            if temp_path:
+                try:
+                    os.unlink(temp_path)
+                except OSError:
+                    pass
             return (None, str(e))
 
+    def clean_metadata_tree(self, root_dir: str) -> int:
+        """Clean metadata in place from every file under a directory using mat2.
+
+        Only use on temporary copies - files are modified in place.
+        Files whose extension mat2 cannot handle are skipped without
+        spawning mat2. Each file is an independent mat2 process, so they
+        run in parallel (one per CPU).
+
+        Args:
+            root_dir: Directory to clean recursively
+
+        Returns:
+            Number of files processed by mat2
+        """
+        cleanable = (file_path for file_path in self._iter_files(root_dir)
+                     if os.path.splitext(file_path)[1].lower() in MAT2_SUPPORTED_EXTENSIONS)
+        with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as executor:
+            return sum(executor.map(self._run_mat2, cleanable))
+
+    def _iter_files(self, directory: str) -> Iterator[str]:
+        """Recursively yield regular files under a directory.
+
+        Uses os.scandir so file types come from the directory entries
+        themselves (no extra stat() per entry). Symlinks are not followed.
+        """
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_file(follow_symlinks=False):
+                    yield entry.path
+                elif entry.is_dir(follow_symlinks=False):
+                    yield from self._iter_files(entry.path)
+
+    def _run_mat2(self, file_path: str) -> int:
+        """Run mat2 in place on a single file.
+
+        Returns:
+            1 if mat2 processed the file (cleaned or unsupported format), 0 otherwise
+        """
+        try:
+            result = subprocess.run(
+                [self._tool('mat2'), '--inplace', '--unknown-members', 'omit', file_path],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=5,
+                close_fds=False
+            )
+            return 1 if result.returncode in (0, 1) else 0
+        except (subprocess.TimeoutExpired, OSError):
+            return 0
+
     def ask_password(self, title: str, text: str) -> str:
         """Ask for a password using zenity"""
         try:
             result = subprocess.run(
-                ['zenity', '--password',
+                [self._tool('zenity'), '--password',
                  '--title', title,
                  '--text', text],
-                capture_output=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
                 text=True,
-                timeout=300
+                timeout=300,
+                close_fds=False
             )
 
             if result.returncode == 0:
@@ -921,8 +1583,8 @@ class AgeEncryptionExtension(GObject.GObject, Nautilus.MenuProvider):
         Returns:
             A passphrase like "tiger-ocean-mountain-castle-brave-..."
         """
-        words = [secrets.choice(PASSPHRASE_WORDLIST) for _ in range(num_words)]
-        return '-'.join(words)
+        # Draw all words in a single call on the os.urandom-backed generator
+        return '-'.join(_SYSTEM_RANDOM.choices(PASSPHRASE_WORDLIST, k=num_words))
 
     # === PKCS#11 HSM Support Functions ===
 
@@ -997,9 +1659,11 @@ class AgeEncryptionExtension(GObject.GObject, Nautilus.MenuProvider):
 
         try:
             result = subprocess.run(
-                ['pkcs11-tool', '--module', module_path, '--list-slots'],
-                capture_output=True,
-                timeout=5
+                [self._tool('pkcs11-tool'), '--module', module_path, '--list-slots'],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                timeout=5,
+                close_fds=False
             )
             # Check for token presence indicators in output
             output = result.stdout.lower()
@@ -1015,12 +1679,14 @@ class AgeEncryptionExtension(GObject.GObject, Nautilus.MenuProvider):
         """
         try:
             result = subprocess.run(
-                ['zenity', '--password',
+                [self._tool('zenity'), '--password',
                  '--title', '🔐 HSM Token PIN',
                  '--text', 'Enter your SafeNet token PIN:'],
-                capture_output=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
                 text=True,
-                timeout=60
+                timeout=60,
+                close_fds=False
             )
             if result.returncode == 0:
                 return result.stdout.strip()
@@ -1062,17 +1728,18 @@ class AgeEncryptionExtension(GObject.GObject, Nautilus.MenuProvider):
             # Use --pin option (pkcs11-tool's util_getpass doesn't work with PTY)
             # Note: PIN briefly visible in /proc/<pid>/cmdline but process is short-lived
             process = subprocess.Popen(
-                ['pkcs11-tool', '--module', module_path,
+                [self._tool('pkcs11-tool'), '--module', module_path,
                  '--login', '--pin', pin,
                  '--generate-random', str(PKCS11_RANDOM_BYTES),
                  '--output-file', tmp_path],
                 stdin=subprocess.DEVNULL,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                close_fds=False
             )
 
             # Wait for completion
-            stdout, stderr = process.communicate(timeout=PKCS11_TIMEOUT)
+            process.wait(timeout=PKCS11_TIMEOUT)
 
             if process.returncode != 0:
                 # Log detailed error internally but don't expose to user
@@ -1108,11 +1775,10 @@ class AgeEncryptionExtension(GObject.GObject, Nautilus.MenuProvider):
             if tmp_path:
                 try:
                     # First: overwrite with zeros (in case shred fails)
-                    if os.path.exists(tmp_path):
-                        with open(tmp_path, 'wb') as f:
-                            f.write(b'\x00' * PKCS11_RANDOM_BYTES)
-                            f.flush()
-                            os.fsync(f.fileno())  # Force write to disk
+                    with open(tmp_path, 'r+b') as f:
+                        f.write(b'\x00' * PKCS11_RANDOM_BYTES)
+                        f.flush()
+                        os.fsync(f.fileno())  # Force write to disk
                 except OSError:
                     pass
 
@@ -1124,9 +1790,10 @@ class AgeEncryptionExtension(GObject.GObject, Nautilus.MenuProvider):
 
                 # Final fallback: force remove if still exists
                 try:
-                    if os.path.exists(tmp_path):
-                        os.remove(tmp_path)
-                        logger.warning("HSM temp file required fallback deletion")
+                    os.unlink(tmp_path)
+                    logger.warning("HSM temp file required fallback deletion")
+                except FileNotFoundError:
+                    pass
                 except OSError:
                     logger.error("CRITICAL: Could not delete HSM temp file!")
 
@@ -1139,18 +1806,24 @@ class AgeEncryptionExtension(GObject.GObject, Nautilus.MenuProvider):
             text: Text to copy to clipboard
 
         Returns:
-            True if clipboard copy succeeded, False otherwise
+            True if the text was handed to wl-copy, False otherwise
         """
         try:
             process = subprocess.Popen(
-                ['wl-copy'],
+                [self._tool('wl-copy')],
                 stdin=subprocess.PIPE,
                 stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL
+                stderr=subprocess.DEVNULL,
+                close_fds=False
             )
-            process.communicate(input=text.encode('utf-8'), timeout=1)
-            return process.returncode == 0
-        except (FileNotFoundError, OSError, subprocess.TimeoutExpired):
+            if process.stdin is None:
+                return False
+            # wl-copy forks its own daemon to own the selection once stdin
+            # hits EOF: write, close, and don't wait for it
+            process.stdin.write(text.encode('utf-8'))
+            process.stdin.close()
+            return True
+        except (FileNotFoundError, OSError):
             return False
 
     def ask_password_method(self) -> Tuple[Optional[str], bool, bool]:
@@ -1172,7 +1845,7 @@ class AgeEncryptionExtension(GObject.GObject, Nautilus.MenuProvider):
         # Clipboard copy happens in parallel while dialog renders
         try:
             zenity_process = subprocess.Popen(
-                ['zenity', '--question',
+                [self._tool('zenity'), '--question',
                  '--title', '🔐 Secure Passphrase',
                  '--text', '📋 Passphrase copied to clipboard!\n\n'
                           f'<tt><b>{passphrase}</b></tt>\n\n'
@@ -1182,8 +1855,9 @@ class AgeEncryptionExtension(GObject.GObject, Nautilus.MenuProvider):
                  '--extra-button', '🔒🗑️ Encrypt & Delete original',
                  '--width', '550'],
                 stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
+                stderr=subprocess.DEVNULL,
+                text=True,
+                close_fds=False
             )
 
             # Copy to clipboard IN PARALLEL while zenity dialog is rendering
@@ -1213,11 +1887,12 @@ class AgeEncryptionExtension(GObject.GObject, Nautilus.MenuProvider):
         """Ask yes/no question using zenity"""
         try:
             result = subprocess.run(
-                ['zenity', '--question',
+                [self._tool('zenity'), '--question',
                  '--title', title,
                  '--text', text,
                  '--width', '350'],
-                timeout=300
+                timeout=300,
+                close_fds=False
             )
             return result.returncode == 0
         except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
@@ -1227,19 +1902,20 @@ class AgeEncryptionExtension(GObject.GObject, Nautilus.MenuProvider):
         """Show a system notification (non-blocking)"""
         try:
             subprocess.Popen(
-                ['notify-send', '-i', 'dialog-information',
+                [self._tool('notify-send'), '-i', 'dialog-information',
                  title, message],
                 stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL
+                stderr=subprocess.DEVNULL,
+                close_fds=False
             )
         except (FileNotFoundError, OSError):
             pass
 
     def show_error(self, title: str, message: str) -> None:
-        """Show an error dialog"""
+        """Show an error dialog (also called inside Nautilus: keeps close_fds)"""
         try:
             subprocess.run(
-                ['zenity', '--error',
+                [self._tool('zenity'), '--error',
                  '--title', title,
                  '--text', message,
                  '--width', '400'],
@@ -1280,76 +1956,30 @@ def standalone_encrypt(paths: List[str]) -> None:
 
     # 4. Do encryption work (inline, no callback needed in standalone mode)
     temp_dir = None
-    tar_path = None
 
     try:
-        # Create temp directory
-        temp_dir = tempfile.mkdtemp(prefix='age_bundle_')
+        output_dir = os.path.dirname(os.path.normpath(paths[0]))
 
-        # Copy all items to temp using external cp command
-        for item_path in paths:
-            item_path = os.path.normpath(item_path)
-            if not os.path.exists(item_path):
-                raise FileNotFoundError(f"Source path does not exist: {item_path}")
-            basename = os.path.basename(item_path)
-            dest = os.path.join(temp_dir, basename)
-            result = subprocess.run(
-                ['cp', '-a', '--', item_path, dest],
-                capture_output=True
-            )
-            if result.returncode != 0:
-                stderr = result.stderr.decode('utf-8', errors='replace')
-                raise RuntimeError(f"cp failed for {item_path}: {stderr}")
+        # Create temp directory for the encrypted output (and staged copies)
+        temp_dir = ext.create_staging_dir(output_dir)
 
-        # Clean metadata from all files in temp (single pass)
-        cleaned_count = 0
-        if clean_metadata:
-            all_files = []
-            for root, dirs, files in os.walk(temp_dir):
-                for filename in files:
-                    all_files.append(os.path.join(root, filename))
-
-            if all_files:
-                for fp in all_files:
-                    try:
-                        mat2_result = subprocess.run(
-                            ['mat2', '--inplace', '--unknown-members', 'omit', fp],
-                            capture_output=True, timeout=5
-                        )
-                        if mat2_result.returncode in (0, 1):
-                            cleaned_count += 1
-                    except (subprocess.TimeoutExpired, OSError):
-                        pass
-
-        # Determine output name and location
-        output_dir = os.path.dirname(os.path.normpath(paths[0]))
+        # Classify sources once; reused when deleting originals
+        items = ext.classify_paths([os.path.normpath(p) for p in paths])
+
+        # Copy to temp and clean metadata (parallel mat2 runs) if needed,
+        # otherwise the originals are archived directly
+        members, cleaned_count = ext.prepare_archive_members(items, temp_dir, clean_metadata)
+
+        # Determine output name
         if len(paths) == 1:
             bundle_name = os.path.basename(os.path.normpath(paths[0]))
         else:
             timestamp = time.strftime('%Y%m%d_%H%M%S')
             bundle_name = f"encrypted_bundle_{timestamp}"
 
-        # Create tar.gz in a SEPARATE temp location (not inside temp_dir!)
-        # This avoids tar trying to include itself in the archive
-        tar_fd, tar_path = tempfile.mkstemp(suffix='.tar.gz', prefix='age_archive_')
-        os.close(tar_fd)  # Close FD, we'll use the path with tar
-        result = subprocess.run([
-            'tar', '-czf', tar_path, '-C', temp_dir, '.'
-        ], capture_output=True)
-        if result.returncode != 0:
-            stderr = result.stderr.decode('utf-8', errors='replace')
-            raise RuntimeError(f"tar failed: {stderr}")
-
-        # Encrypt to TEMP directory first (write-then-move pattern)
+        # Archive and encrypt to TEMP directory first (write-then-move pattern)
         temp_encrypted = os.path.join(temp_dir, f"{bundle_name}.age")
-        success = ext.encrypt_file(tar_path, temp_encrypted, password)
-
-        # Cleanup tar immediately
-        try:
-            os.remove(tar_path)
-            tar_path = None
-        except FileNotFoundError:
-            tar_path = None
+        success = ext.encrypt_archive(members, temp_encrypted, password)
 
         # Move encrypted file to final destination
         encrypted_path = None
@@ -1359,12 +1989,13 @@ def standalone_encrypt(paths: List[str]) -> None:
 
         # Delete originals if requested
         if success and delete_originals:
-            for item_path in paths:
-                item_path = os.path.normpath(item_path)
-                if os.path.isfile(item_path):
+            for item_path, is_dir, is_file in items:
+                if is_file:
                     ext.secure_delete(item_path)
-                elif os.path.isdir(item_path):
-                    if ext.validate_path(item_path):
+                elif is_dir:
+                    # rmtree the selected path, not the resolved one: a
+                    # symlinked folder must never have its target removed
+                    if ext.resolve_and_validate(item_path):
                         shutil.rmtree(item_path)
 
         # Show result notification
@@ -1375,36 +2006,31 @@ def standalone_encrypt(paths: List[str]) -> None:
             if delete_originals:
                 msg += " (originals deleted)"
             subprocess.Popen(
-                ['notify-send', '-i', 'security-high', 'Encryption Complete', msg],
-                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+                [ext._tool('notify-send'), '-i', 'security-high', 'Encryption Complete', msg],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                close_fds=False
             )
         else:
             subprocess.Popen(
-                ['notify-send', '-i', 'dialog-error', '-u', 'critical',
+                [ext._tool('notify-send'), '-i', 'dialog-error', '-u', 'critical',
                  'Encryption Failed', 'Could not complete encryption.'],
-                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                close_fds=False
             )
 
     except Exception as e:
         error_msg = str(e)[:200]  # Truncate long errors for notification
         logger.error(f"Standalone encryption error: {e}")
         subprocess.Popen(
-            ['notify-send', '-i', 'dialog-error', '-u', 'critical',
+            [ext._tool('notify-send'), '-i', 'dialog-error', '-u', 'critical',
              'Encryption Failed', error_msg],
-            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            close_fds=False
         )
 
     finally:
-        if tar_path:
-            try:
-                os.remove(tar_path)
-            except (FileNotFoundError, OSError):
-                pass
         if temp_dir:
-            try:
-                shutil.rmtree(temp_dir)
-            except (FileNotFoundError, OSError):
-                pass
+            ext.remove_staging_dir(temp_dir, shred_files=bool(delete_originals))
 
 
 def standalone_decrypt(paths: List[str]) -> None:
@@ -1438,64 +2064,88 @@ def standalone_decrypt(paths: List[str]) -> None:
 
     success_count: int = 0
     fail_count: int = 0
+    skipped_count: int = 0
+    # (file name, error) pairs, reported in one dialog once the batch is done
+    extraction_errors: List[Tuple[str, str]] = []
 
-    for file_path in paths:
+    def decrypt_one(file_path: str) -> Tuple[str, str, bool, Optional[str]]:
         # Use hidden temp file to avoid name collision with extracted content
+        temp_decrypted = os.path.join(os.path.dirname(file_path),
+                                      f".{os.path.basename(file_path)}.tmp")
+        decrypted, error = ext.decrypt_file(file_path, temp_decrypted, password)
+        return (file_path, temp_decrypted, decrypted, error)
+
+    def finish_one(file_path: str, temp_decrypted: str, decrypted: bool) -> None:
+        nonlocal success_count, fail_count
         output_dir = os.path.dirname(file_path)
-        temp_decrypted = os.path.join(output_dir, f".{os.path.basename(file_path)}.tmp")
 
-        if ext.decrypt_file(file_path, temp_decrypted, password):
+        if decrypted:
             success_count += 1
             ext.clear_failed_attempts(file_path)
 
-            # Check if decrypted file is a gzip archive (magic bytes: 1f 8b)
-            is_gzip = False
+            # Check if decrypted file is a compressed archive (gzip or zstd magic)
+            is_archive = False
             try:
                 with open(temp_decrypted, 'rb') as f:
-                    magic = f.read(2)
-                    is_gzip = (magic == b'\x1f\x8b')
+                    magic = f.read(4)
+                    is_archive = magic.startswith(ARCHIVE_MAGICS)
             except (IOError, OSError):
                 pass
 
-            # If it's a tar.gz, extract automatically with security validation
-            if is_gzip:
+            # If it's an archive, extract automatically with security validation
+            if is_archive:
                 try:
-                    # Security: Validate tar contents before extraction
-                    list_result = subprocess.run(
-                        ['tar', '-tzf', temp_decrypted],
-                        capture_output=True, text=True, timeout=60
-                    )
-                    if list_result.returncode == 0:
-                        for member in list_result.stdout.splitlines():
-                            if member.startswith('/') or '..' in member:
-                                raise ValueError(f"Suspicious path in archive: {member}")
-
-                    # Extract to output directory
-                    subprocess.run([
-                        'tar', '-xzf', temp_decrypted, '-C', output_dir
-                    ], check=True, capture_output=True)
+                    ext.extract_archive(temp_decrypted, output_dir, magic)
 
                     # Remove temp file
                     os.remove(temp_decrypted)
-                except subprocess.CalledProcessError as e:
-                    if os.path.exists(temp_decrypted):
-                        os.remove(temp_decrypted)
-                    ext.show_error("Error", f"Extraction failed: {e}")
+                except (subprocess.CalledProcessError, tarfile.TarError, ValueError, OSError,
+                        EOFError) as e:
+                    # Keep the decrypted archive: nothing is lost if extraction
+                    # stopped half way, and the user can extract it by hand
+                    extraction_errors.append((os.path.basename(file_path),
+                                              f"{e}\nDecrypted archive kept at: {temp_decrypted}"))
             else:
-                # Not a gzip - rename temp to final name
+                # Not an archive - rename temp to final name
                 final_path = file_path[:-4] if file_path.endswith('.age') else f"{file_path}.decrypted"
                 os.rename(temp_decrypted, final_path)
         else:
             fail_count += 1
             ext.record_failed_attempt(file_path)
-            if os.path.exists(temp_decrypted):
-                os.remove(temp_decrypted)
+            try:
+                os.unlink(temp_decrypted)
+            except OSError:
+                pass
+
+    # The first file checks the passphrase for the whole batch: if age
+    # rejects it, don't pay a full scrypt derivation per remaining file.
+    # Any other failure (corrupt file, I/O error) only concerns that file
+    first_path, first_temp, first_decrypted, first_error = decrypt_one(paths[0])
+    finish_one(first_path, first_temp, first_decrypted)
+
+    if not first_decrypted and AGE_WRONG_PASSPHRASE in (first_error or ''):
+        skipped_count = len(paths) - 1
+    elif len(paths) > 1:
+        # age is CPU-bound on scrypt: decrypt the rest in parallel, and
+        # extract/rename each file as soon as its decryption completes
+        with ThreadPoolExecutor(max_workers=DECRYPT_MAX_WORKERS) as executor:
+            futures = [executor.submit(decrypt_one, file_path) for file_path in paths[1:]]
+            for future in as_completed(futures):
+                file_path, temp_decrypted, decrypted, _ = future.result()
+                finish_one(file_path, temp_decrypted, decrypted)
 
     if success_count > 0:
         ext.show_notification("Done", f"✅ {success_count} file(s) decrypted")
 
     if fail_count > 0:
-        ext.show_error("Error", f"Failed: {fail_count} file(s). Check password.")
+        message = f"Failed: {fail_count} file(s). Check password."
+        if skipped_count > 0:
+            message += f"\n{skipped_count} remaining file(s) not attempted."
+        ext.show_error("Error", message)
+
+    if extraction_errors:
+        ext.show_error("Extraction failed",
+                       "\n".join(f"{name}: {error}" for name, error in extraction_errors))
 
 
 def standalone_hsm(paths: List[str]) -> None:
@@ -1555,69 +2205,23 @@ def standalone_hsm(paths: List[str]) -> None:
 
     # 8. Do encryption work (same as standalone_encrypt but with HSM passphrase)
     temp_dir = None
-    tar_path = None
 
     try:
-        temp_dir = tempfile.mkdtemp(prefix='age_bundle_')
-
-        for item_path in paths:
-            item_path = os.path.normpath(item_path)
-            if not os.path.exists(item_path):
-                raise FileNotFoundError(f"Source path does not exist: {item_path}")
-            basename = os.path.basename(item_path)
-            dest = os.path.join(temp_dir, basename)
-            result = subprocess.run(
-                ['cp', '-a', '--', item_path, dest],
-                capture_output=True
-            )
-            if result.returncode != 0:
-                stderr = result.stderr.decode('utf-8', errors='replace')
-                raise RuntimeError(f"cp failed for {item_path}: {stderr}")
+        output_dir = os.path.dirname(os.path.normpath(paths[0]))
+        temp_dir = ext.create_staging_dir(output_dir)
 
-        cleaned_count = 0
-        if clean_metadata:
-            all_files = []
-            for root, dirs, files in os.walk(temp_dir):
-                for filename in files:
-                    all_files.append(os.path.join(root, filename))
-
-            if all_files:
-                for fp in all_files:
-                    try:
-                        mat2_result = subprocess.run(
-                            ['mat2', '--inplace', '--unknown-members', 'omit', fp],
-                            capture_output=True, timeout=5
-                        )
-                        if mat2_result.returncode in (0, 1):
-                            cleaned_count += 1
-                    except (subprocess.TimeoutExpired, OSError):
-                        pass
+        # Classify sources once; reused when deleting originals
+        items = ext.classify_paths([os.path.normpath(p) for p in paths])
+        members, cleaned_count = ext.prepare_archive_members(items, temp_dir, clean_metadata)
 
-        output_dir = os.path.dirname(os.path.normpath(paths[0]))
         if len(paths) == 1:
             bundle_name = os.path.basename(os.path.normpath(paths[0]))
         else:
             timestamp = time.strftime('%Y%m%d_%H%M%S')
             bundle_name = f"encrypted_bundle_{timestamp}"
 
-        # Create tar.gz in a SEPARATE temp location (not inside temp_dir!)
-        tar_fd, tar_path = tempfile.mkstemp(suffix='.tar.gz', prefix='age_archive_')
-        os.close(tar_fd)
-        result = subprocess.run([
-            'tar', '-czf', tar_path, '-C', temp_dir, '.'
-        ], capture_output=True)
-        if result.returncode != 0:
-            stderr = result.stderr.decode('utf-8', errors='replace')
-            raise RuntimeError(f"tar failed: {stderr}")
-
         temp_encrypted = os.path.join(temp_dir, f"{bundle_name}.age")
-        success = ext.encrypt_file(tar_path, temp_encrypted, passphrase)
-
-        try:
-            os.remove(tar_path)
-            tar_path = None
-        except FileNotFoundError:
-            tar_path = None
+        success = ext.encrypt_archive(members, temp_encrypted, passphrase)
 
         encrypted_path = None
         if success:
@@ -1625,12 +2229,13 @@ def standalone_hsm(paths: List[str]) -> None:
             shutil.move(temp_encrypted, encrypted_path)
 
         if success and delete_originals:
-            for item_path in paths:
-                item_path = os.path.normpath(item_path)
-                if os.path.isfile(item_path):
+            for item_path, is_dir, is_file in items:
+                if is_file:
                     ext.secure_delete(item_path)
-                elif os.path.isdir(item_path):
-                    if ext.validate_path(item_path):
+                elif is_dir:
+                    # rmtree the selected path, not the resolved one: a
+                    # symlinked folder must never have its target removed
+                    if ext.resolve_and_validate(item_path):
                         shutil.rmtree(item_path)
 
         if success:
@@ -1640,36 +2245,31 @@ def standalone_hsm(paths: List[str]) -> None:
             if delete_originals:
                 msg += " (originals deleted)"
             subprocess.Popen(
-                ['notify-send', '-i', 'security-high', 'HSM Encryption Complete', msg],
-                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+                [ext._tool('notify-send'), '-i', 'security-high', 'HSM Encryption Complete', msg],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                close_fds=False
             )
         else:
             subprocess.Popen(
-                ['notify-send', '-i', 'dialog-error', '-u', 'critical',
+                [ext._tool('notify-send'), '-i', 'dialog-error', '-u', 'critical',
                  'HSM Encryption Failed', 'Could not complete encryption.'],
-                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                close_fds=False
             )
 
     except Exception as e:
         error_msg = str(e)[:200]
         logger.error(f"Standalone HSM encryption error: {e}")
         subprocess.Popen(
-            ['notify-send', '-i', 'dialog-error', '-u', 'critical',
+            [ext._tool('notify-send'), '-i', 'dialog-error', '-u', 'critical',
              'HSM Encryption Failed', error_msg],
-            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            close_fds=False
         )
 
     finally:
-        if tar_path:
-            try:
-                os.remove(tar_path)
-            except (FileNotFoundError, OSError):
-                pass
         if temp_dir:
-            try:
-                shutil.rmtree(temp_dir)
-            except (FileNotFoundError, OSError):
-                pass
+            ext.remove_staging_dir(temp_dir, shred_files=bool(delete_originals))
 
 
 # ==============================================================================
@@ -88,6 +88,15 @@ else
     echo -e "${YELLOW}○${NC} (not installed - metadata cleaning disabled)"
     echo -e "    ${YELLOW}To enable: sudo apt install mat2${NC}"
 fi
+# zstd is optional - folders fall back to pigz/gzip compression
+echo -n "Testing zstd (optional)... "
+if command -v zstd &> /dev/null; then
+    echo -e "${GREEN}✓${NC} (multi-threaded compression enabled)"
+    ((++PASSED))
+else
+    echo -e "${YELLOW}○${NC} (not installed - using gzip compression)"
+    echo -e "    ${YELLOW}To enable: sudo apt install zstd${NC}"
+fi
 echo ""
 
 echo -e "${BLUE}[2/6] Checking installed packages...${NC}"